@@ -2,17 +2,70 @@
 
 import streamlit as st
 import tempfile
+import threading
 import os
+import requests
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from PIL import Image
 import pandas as pd
 
+from config import INGEST_BATCH_SIZE
 from document_processor import DocumentProcessor
 from guardrails import GuardrailsManager
 from llm_manager import LocalLLMManager
+from semantic_cache import SemanticCache
 from vector_store import VectorStore
 
 
+@st.cache_data(ttl=10)
+def _ollama_alive(api_url: str) -> bool:
+    """
+    Cached Ollama liveness probe. Streamlit reruns the whole script on every
+    widget interaction; caching for 10s keeps the blocking HTTP check off
+    the critical path of each rerun.
+    """
+    try:
+        return requests.get(f"{api_url}/api/tags", timeout=1).status_code == 200
+    except requests.RequestException:
+        return False
+
+
+# Metadata value types ChromaDB can store as-is; anything else is stringified
+_SCALAR = (str, int, float, bool, type(None))
+
+
+def _process_one(path: str, file_type: str, source_name: str):
+    """
+    Extract and chunk a single document. Module-level so it pickles cleanly
+    for ProcessPoolExecutor workers; each worker builds its own processor.
+
+    Returns (chunks_with_meta, source_name) with metadata already sanitized
+    and tagged with source/file_type/chunk_type.
+    """
+    processor = DocumentProcessor()
+
+    processed = []
+    for chunk in processor.process_document(path, file_type):
+        chunk_type = chunk.get("type", "text")
+        # Sanitize (drop 'content', stringify non-scalars) and tag the
+        # metadata in a single dict construction
+        metadata = {
+            **{k: (v if isinstance(v, _SCALAR) else str(v))
+               for k, v in chunk.get("metadata", {}).items() if k != "content"},
+            "source": source_name,
+            "file_type": file_type,
+            "chunk_type": chunk_type
+        }
+
+        processed.append({
+            "type": chunk_type,
+            "content": chunk.get("content", ""),
+            "metadata": metadata
+        })
+
+    return processed, source_name
+
+
 class RunbookApp:
     def __init__(self):
         self.doc_processor = DocumentProcessor()
@@ -24,6 +77,17 @@ class RunbookApp:
             st.session_state.documents_loaded = False
         if 'chat_history' not in st.session_state:
             st.session_state.chat_history = []
+        if 'semantic_cache' not in st.session_state:
+            st.session_state.semantic_cache = SemanticCache()
+        if 'warmup_started' not in st.session_state:
+            # Pull and preload the model in the background so warmup
+            # overlaps user think-time and document upload
+            st.session_state.warmup_started = True
+            threading.Thread(target=self._warm_llm, daemon=True).start()
+
+    def _warm_llm(self):
+        self.llm_manager.pull_model()
+        self.llm_manager.warm_up()
 
     def setup_sidebar(self):
         st.sidebar.title("⚙️ Configuration")
@@ -33,7 +97,7 @@ class RunbookApp:
             self.llm_manager.model_name = selected_model
 
         st.sidebar.subheader("🔧 System Status")
-        ollama_status = self.llm_manager.ensure_ollama_running()
+        ollama_status = _ollama_alive(self.llm_manager.api_url)
         st.sidebar.write(f"Ollama: {'🟢 Running' if ollama_status else '🔴 Stopped'}")
         if not ollama_status and st.sidebar.button("Start Ollama"):
             st.sidebar.info("Please start Ollama manually")
@@ -42,6 +106,8 @@ class RunbookApp:
         if st.sidebar.button("Clear Documents"):
             self.vector_store.clear_collection()
             st.session_state.documents_loaded = False
+            # Cached answers were grounded in the deleted corpus
+            st.session_state.semantic_cache = SemanticCache()
             st.sidebar.success("Documents cleared!")
 
     def document_upload_section(self):
@@ -57,54 +123,59 @@ class RunbookApp:
             progress_bar = st.progress(0)
             status_text = st.empty()
 
-            all_chunks = []
-
-            for i, uploaded_file in enumerate(uploaded_files):
-                status_text.text(f"Processing {uploaded_file.name}...")
-
+            # Chunks are flushed to the vector store in bounded batches so
+            # memory stays flat and embedding overlaps with extraction.
+            batch = []
+            total_chunks = 0
+
+            # Write all temp files up front, then extract in parallel: the
+            # per-file work (PyMuPDF, table extraction, splitting) is CPU-bound.
+            tmp_paths = []
+            file_types = []
+            source_names = []
+            for uploaded_file in uploaded_files:
                 with tempfile.NamedTemporaryFile(delete=False, suffix=Path(uploaded_file.name).suffix) as tmp_file:
                     tmp_file.write(uploaded_file.getvalue())
-                    tmp_path = tmp_file.name
-
-                try:
-                    file_type = Path(uploaded_file.name).suffix[1:].lower()
-                    chunks_with_meta = self.doc_processor.process_document(tmp_path, file_type)
-                    
-                    def clean_metadata(md):
-                        # Remove any 'content' key
-                        md = dict(md)
-                        md.pop("content", None)
-                        # For safety, cast any list/dict/other values to string
-                        for k,v in md.items():
-                            if not isinstance(v, (str, int, float, bool, type(None))):
-                                md[k] = str(v)
-                        return md
-
-                    for chunk in chunks_with_meta:
-                        content = chunk.get("content", "")
-                        metadata = clean_metadata(chunk.get("metadata", {}))
-                        metadata.update({
-                            "source": uploaded_file.name,
-                            "file_type": file_type
-                        })
-                        metadata["chunk_type"] = chunk.get("type", "text")
-
-                        all_chunks.append({
-                            "type": chunk.get("type", "text"),
-                            "content": content,
-                            "metadata": metadata
-                        })
-                except Exception as e:
-                    st.error(f"Error processing {uploaded_file.name}: {str(e)}")
-                finally:
+                    tmp_paths.append(tmp_file.name)
+                file_types.append(Path(uploaded_file.name).suffix[1:].lower())
+                source_names.append(uploaded_file.name)
+
+            status_text.text(f"Processing {len(uploaded_files)} documents...")
+            max_workers = max(1, (os.cpu_count() or 2) - 1)
+            try:
+                with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                    futures = {
+                        pool.submit(_process_one, path, file_type, name): name
+                        for path, file_type, name in zip(tmp_paths, file_types, source_names)
+                    }
+                    done = 0
+                    for future in as_completed(futures):
+                        name = futures[future]
+                        try:
+                            chunks, _ = future.result()
+                            batch.extend(chunks)
+                            total_chunks += len(chunks)
+                            if len(batch) >= INGEST_BATCH_SIZE:
+                                self.vector_store.add_documents(batch)
+                                batch = []
+                        except Exception as e:
+                            st.error(f"Error processing {name}: {str(e)}")
+                        done += 1
+                        progress_bar.progress(done / len(uploaded_files))
+            finally:
+                for tmp_path in tmp_paths:
                     os.unlink(tmp_path)
 
-                progress_bar.progress((i + 1) / len(uploaded_files))
+            if batch:
+                self.vector_store.add_documents(batch)
 
-            if all_chunks:
-                self.vector_store.add_documents(all_chunks)
+            if total_chunks:
                 st.session_state.documents_loaded = True
-                st.success(f"Successfully processed {len(uploaded_files)} documents with {len(all_chunks)} chunks!")
+                # Drop cached answers: they were grounded in the corpus as it
+                # was before this ingest, and a near-duplicate question would
+                # otherwise silently answer from the old documents
+                st.session_state.semantic_cache = SemanticCache()
+                st.success(f"Successfully processed {len(uploaded_files)} documents with {total_chunks} chunks!")
 
             progress_bar.empty()
             status_text.empty()
@@ -119,8 +190,12 @@ class RunbookApp:
             image_path = metadata.get("file")
             caption = metadata.get("caption", "Image")
             if image_path and os.path.exists(image_path):
-                img = Image.open(image_path)
-                st.image(img, caption=caption)
+                # Hand the path straight to Streamlit so the file is
+                # streamed to the browser without a Python-side decode
+                if image_path.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')):
+                    st.image(image_path, caption=caption)
+                else:
+                    st.write(f"[Unsupported image format: {caption}]")
             else:
                 st.write(f"[Image not found: {caption}]")
         elif chunk_type == "table":
@@ -165,11 +240,27 @@ class RunbookApp:
                         {"documents": ["available"]}
                     )
                     
-                    print(validated_query)
+                    # Semantic cache: reuse a previous answer for near-duplicate questions
+                    query_embedding = self.vector_store.embed_query(validated_query)
+                    cached = st.session_state.semantic_cache.lookup(query_embedding)
+                    if cached is not None:
+                        cached_response, cached_chunks = cached
+                        st.success("Response retrieved from cache!")
+                        st.markdown(f"**Answer:** {cached_response}")
+
+                        with st.expander("📚 Source References and Evidence"):
+                            for chunk in cached_chunks:
+                                self.display_chunk(chunk)
+
+                        answer_text_chunk = {
+                            "type": "text",
+                            "content": cached_response,
+                            "metadata": {"source": "LLM Answer"}
+                        }
+                        st.session_state.chat_history.append((user_query, [answer_text_chunk] + cached_chunks))
+                        return
 
                     results = self.vector_store.search_similar(validated_query, n_results=5)
-                    
-                    print(results)
 
                     docs = results.get("documents", [])
                     metas = results.get("metadatas", [])
@@ -208,17 +299,34 @@ class RunbookApp:
 
                     context_for_llm = "\n\n".join(context_texts)
 
-                    # Generate answer using LLM
-                    response = self.llm_manager.generate_response(validated_query, context_for_llm)
-                    
-                    print()
-                    print()
-                    print("res=>  ",response)
+                    # Tokenize the sources once; every validation pass over
+                    # the (growing) response reuses this vector
+                    source_vector = self.guardrails.prepare_sources(context_texts)
+
+                    # Generate answer using LLM, streaming tokens to the UI.
+                    # Guardrails run on the accumulated buffer every few
+                    # chunks so a clearly ungrounded generation is aborted
+                    # before it completes.
+                    response_parts = []
+
+                    def _token_stream():
+                        for i, piece in enumerate(
+                                self.llm_manager.generate_response_stream(validated_query, context_for_llm)):
+                            response_parts.append(piece)
+                            yield piece
+                            if (i + 1) % 32 == 0:
+                                buffer = "".join(response_parts)
+                                if len(buffer) > 200 and not self.guardrails.validate_output(
+                                        buffer, context_texts, source_vector=source_vector):
+                                    return
+
+                    st.markdown("**Answer:**")
+                    st.write_stream(_token_stream())
+                    response = "".join(response_parts)
 
                     # Validate output
-                    if self.guardrails.validate_output(response, context_texts):
+                    if self.guardrails.validate_output(response, context_texts, source_vector=source_vector):
                         st.success("Response generated successfully!")
-                        st.markdown(f"**Answer:** {response}")
 
                         with st.expander("📚 Source References and Evidence"):
                             for chunk in retrieved_chunks:
@@ -230,6 +338,7 @@ class RunbookApp:
                             "metadata": {"source": "LLM Answer"}
                         }
                         st.session_state.chat_history.append((user_query, [answer_text_chunk] + retrieved_chunks))
+                        st.session_state.semantic_cache.add(query_embedding, response, retrieved_chunks)
                     else:
                         st.error("Response failed validation checks.")
 
@@ -31,15 +31,48 @@ LLM_PARAMS = {
     "temperature": 0.3,
     "top_p": 0.9,
     "max_tokens": 512,
+    "num_ctx": 4096,
     "stream": False,
 }
 
 # === Vector Store Configuration ===
 VECTOR_STORE_COLLECTION_NAME = "runbook_docs"
 
+# Number of chunks flushed to the vector store per add_documents call
+# during ingestion; bounds peak memory and overlaps embedding with
+# extraction when documents are processed in parallel.
+INGEST_BATCH_SIZE = 256
+
+# Rows per collection.add call; keeps ChromaDB's write path from
+# serializing one giant payload and bounds memory in flight.
+CHROMA_ADD_BATCH_SIZE = 1000
+
 # Embedding model name for sentence-transformers
 EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
 
+# Embedding backend: "torch" uses SentenceTransformer (GPU-capable);
+# "onnx" uses an INT8-quantized ONNX Runtime session on CPU (requires
+# optimum[onnxruntime]) - roughly 4x faster than PyTorch eager on CPU.
+EMBEDDING_BACKEND = "torch"
+
+# Where the exported/quantized ONNX model is cached
+ONNX_MODEL_DIR = DATA_DIR / "onnx_model"
+
+# Embedding precision: "float32" stores embeddings unquantized; "int8"
+# rounds L2-normalized embeddings to a fixed symmetric int8 scale before
+# handing them to the index. Neither shipped backend stores int8 natively
+# (Chroma casts back to float, faiss product-quantizes on its own), so
+# int8 is opt-in: it only pays off with a backend that keeps the vectors
+# in int8, and otherwise just adds rounding error.
+QUANTIZATION = "float32"
+
+# === Semantic Query Cache Configuration ===
+# Minimum cosine similarity between a new query embedding and a cached one
+# for the cached answer to be reused (skipping retrieval + LLM entirely).
+SEMANTIC_CACHE_THRESHOLD = 0.95
+# Maximum number of (query, answer) pairs kept in the cache (LRU eviction).
+SEMANTIC_CACHE_SIZE = 128
+
 # === Guardrails Configuration ===
 # Example: max query length allowed (reflects guardrails.py limit)
 MAX_QUERY_LENGTH = 2000
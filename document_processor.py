@@ -1,48 +1,102 @@
 # document_processor.py
 
-import io
 import fitz  # PyMuPDF for PDF processing
 import pdfplumber
-from PIL import Image
+import xxhash
 from docx import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from pathlib import Path
 from config import IMAGES_DIR  # Use centralized config
 
 # Ensure the images directory exists
 IMAGES_DIR.mkdir(parents=True, exist_ok=True)
 
+# Chunk boundaries are preferred in this order (paragraph, line, word)
+_SEPARATORS = ("\n\n", "\n", " ")
+
 
 class DocumentProcessor:
-    def __init__(self, images_dir=IMAGES_DIR):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            separators=["\n\n", "\n", " ", ""]
-        )
+    def __init__(self, images_dir=IMAGES_DIR, chunk_size=1000, chunk_overlap=200):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
         self.images_dir = images_dir
 
+    def split_text(self, text: str):
+        """
+        Split text into overlapping chunks in a single forward pass.
+
+        For each chunk a window of chunk_size characters is taken and the
+        break point snaps back to the nearest paragraph, line, or word
+        boundary in the second half of the window. Unlike LangChain's
+        RecursiveCharacterTextSplitter this never re-scans the text
+        recursively, so splitting is linear in document length.
+        """
+        n = len(text)
+        if n <= self.chunk_size:
+            stripped = text.strip()
+            return [stripped] if stripped else []
+
+        chunks = []
+        start = 0
+        while start < n:
+            end = min(start + self.chunk_size, n)
+            if end < n:
+                window = text[start:end]
+                for sep in _SEPARATORS:
+                    pos = window.rfind(sep)
+                    # Only snap to a boundary in the second half of the
+                    # window so chunks don't degenerate
+                    if pos > self.chunk_size // 2:
+                        end = start + pos + len(sep)
+                        break
+            chunk = text[start:end].strip()
+            if chunk:
+                chunks.append(chunk)
+            if end >= n:
+                break
+            start = max(end - self.chunk_overlap, start + 1)
+        return chunks
+
     def extract_text_images_tables_pdf(self, file_path: str):
         """Extract text, images, and tables from a PDF file."""
-        text = ""
+        text_parts = []
         image_refs = []
         tables = []
 
-        # Extract text and images using PyMuPDF
+        # Extract text, images, and tables in a single PyMuPDF pass
         doc = fitz.open(file_path)
+        seen_xrefs = set()
         for page_number in range(len(doc)):
             page = doc[page_number]
-            text += page.get_text()
+            # Plain text without the sort pass; collected in a list to
+            # avoid quadratic string concatenation across pages
+            text_parts.append(page.get_text("text", sort=False))
+
+            for table_index, found_table in enumerate(page.find_tables()):
+                table_content = found_table.extract()
+                if table_content:
+                    tables.append({
+                        "type": "table",
+                        "content": table_content,
+                        "caption": f"Table {table_index + 1} on page {page_number + 1}",
+                        "page": page_number + 1
+                    })
 
             for img_index, img in enumerate(page.get_images(full=True)):
                 xref = img[0]
+                # The same xref on multiple pages is the same image object
+                # (e.g. a repeated logo) - extract and store it only once
+                if xref in seen_xrefs:
+                    continue
+                seen_xrefs.add(xref)
                 base_image = doc.extract_image(xref)
                 image_bytes = base_image['image']
                 ext = base_image['ext']
-                image_obj = Image.open(io.BytesIO(image_bytes))
                 image_name = f"pdf_page{page_number + 1}_img{img_index + 1}.{ext}"
                 image_path = self.images_dir / image_name
-                image_obj.save(image_path)
+                # The extracted bytes are already a valid image in `ext`
+                # format; write them as-is instead of decoding + re-encoding
+                with open(image_path, 'wb') as f:
+                    f.write(image_bytes)
                 image_refs.append({
                     "type": "image",
                     "file": str(image_path),
@@ -50,31 +104,32 @@ class DocumentProcessor:
                     "page": page_number + 1
                 })
         doc.close()
-
-        # Extract tables using pdfplumber
-        with pdfplumber.open(file_path) as pdf:
-            for page_number, page in enumerate(pdf.pages):
-                for table_index, table in enumerate(page.extract_tables()):
-                    if table:
-                        tables.append({
-                            "type": "table",
-                            "content": table,
-                            "caption": f"Table {table_index + 1} on page {page_number + 1}",
-                            "page": page_number + 1
-                        })
+        text = "".join(text_parts)
+
+        # Fallback: only re-parse with pdfplumber when PyMuPDF found no tables
+        # (can happen on image-heavy/scanned pages)
+        if not tables:
+            with pdfplumber.open(file_path) as pdf:
+                for page_number, page in enumerate(pdf.pages):
+                    for table_index, table in enumerate(page.extract_tables()):
+                        if table:
+                            tables.append({
+                                "type": "table",
+                                "content": table,
+                                "caption": f"Table {table_index + 1} on page {page_number + 1}",
+                                "page": page_number + 1
+                            })
 
         return text, image_refs, tables
 
     def extract_text_images_tables_docx(self, file_path: str):
         """Extract text, images, and tables from a Word (.docx) file."""
         doc = Document(file_path)
-        text = ""
         tables_list = []
         image_refs = []
 
-        # Extract paragraphs
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
+        # Extract paragraphs (joined once instead of concatenated per line)
+        text = "\n".join(paragraph.text for paragraph in doc.paragraphs)
 
         # Extract tables
         for table_index, table in enumerate(doc.tables):
@@ -86,11 +141,16 @@ class DocumentProcessor:
                 "table_index": table_index
             })
 
-        # Extract images (from document relationships)
+        # Extract images (from document relationships), deduplicating
+        # identical bytes referenced by multiple relationships
+        seen_hashes = set()
         for rel in doc.part.rels.values():
             if "image" in rel.target_ref:
                 img_bytes = rel.target_part.blob
-                img_ext = rel.target_ref.split('.')[-1]
+                img_hash = xxhash.xxh3_64(img_bytes).intdigest()
+                if img_hash in seen_hashes:
+                    continue
+                seen_hashes.add(img_hash)
                 img_name = f"{Path(file_path).stem}_{rel.target_ref.split('/')[-1]}"
                 img_path = self.images_dir / img_name
                 with open(img_path, 'wb') as f:
@@ -108,11 +168,11 @@ class DocumentProcessor:
         Process the input document (PDF/DOCX), split into chunks, and attach metadata
         for images/tables found within.
 
-        Returns:
-            A list of dicts with keys: "type", "content", and "metadata".
+        Yields:
+            Dicts with keys: "type", "content", and "metadata". Yielding lets
+            callers flush chunks downstream in bounded batches instead of
+            materializing every chunk of every document at once.
         """
-        chunks_with_meta = []
-
         if file_type.lower() == 'pdf':
             text, images, tables = self.extract_text_images_tables_pdf(file_path)
         elif file_type.lower() in ['docx', 'doc']:
@@ -120,29 +180,27 @@ class DocumentProcessor:
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
 
-        # Append image chunks
+        # Yield image chunks
         for image in images:
-            chunks_with_meta.append({
+            yield {
                 "type": "image",
                 "content": "",
                 "metadata": image
-            })
+            }
 
-        # Append table chunks
+        # Yield table chunks
         for table in tables:
-            chunks_with_meta.append({
+            yield {
                 "type": "table",
                 "content": table["content"],
                 "metadata": table
-            })
+            }
 
-        # Split and append text chunks
-        text_chunks = self.text_splitter.split_text(text)
+        # Split and yield text chunks
+        text_chunks = self.split_text(text)
         for idx, chunk in enumerate(text_chunks):
-            chunks_with_meta.append({
+            yield {
                 "type": "text",
                 "content": chunk,
                 "metadata": {"chunk_id": idx}
-            })
-
-        return chunks_with_meta
+            }
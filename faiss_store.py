@@ -0,0 +1,239 @@
+# faiss_store.py
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# IVF-PQ parameters: nlist k-means partitions, m sub-quantizers of nbits
+# each (16 x 8 bits = 16 bytes per vector, ~24x smaller than float32 at
+# 384 dims). nlist is scaled down automatically for small training sets.
+_NLIST = 1024
+_PQ_M = 16
+_PQ_NBITS = 8
+
+# IVF lists scanned per query; higher = better recall, slower search
+_NPROBE = 16
+
+# Vectors buffered before the index is trained; k-means wants a decent
+# sample and faiss recommends >= ~39 points per centroid
+_TRAIN_MIN = 10000
+_MIN_POINTS_PER_CENTROID = 39
+
+# Each 8-bit sub-quantizer clusters the sample into 2^nbits codewords, so
+# PQ training needs at least this many vectors; smaller corpora get an
+# exact flat index instead
+_PQ_TRAIN_MIN = 1 << _PQ_NBITS
+
+# Keep faiss int64 ids non-negative
+_ID_MASK = (1 << 63) - 1
+
+
+def _int_id(hex_id: str) -> int:
+    """Map a hex row id to the int64 id faiss stores."""
+    return int(hex_id, 16) & _ID_MASK
+
+
+class FaissIVFPQCollection:
+    """
+    FAISS IndexIVFPQ drop-in for the subset of the Chroma collection API
+    VectorStore uses (name / upsert / query / delete).
+
+    Chroma's HNSW keeps full vectors plus graph links in memory, which
+    becomes prohibitive past ~1M rows; IVF-PQ partitions the space with
+    k-means and product-quantizes residuals, shrinking the index ~24x
+    while keeping millisecond search via parallel list scans. Documents
+    and metadata live in a sqlite sidecar keyed by the same int64 ids the
+    index uses; the faiss index itself is persisted with write_index, and
+    vectors still waiting for training are persisted as blobs in the
+    sidecar so nothing is lost on a restart before the first flush.
+
+    The index trains lazily on the first _TRAIN_MIN buffered vectors (or
+    whatever has arrived when the first query lands). nlist is scaled down
+    to fit the training sample, and corpora with fewer than 256 vectors —
+    too few to train the 8-bit PQ codebooks at all — fall back to an exact
+    IndexIDMap(IndexFlatL2), which is cheap at that size anyway.
+    """
+
+    def __init__(self, name: str, persist_directory: str):
+        # Optional dependency, imported lazily like the ONNX backend so the
+        # default Chroma path does not require faiss-cpu
+        import faiss
+
+        self._faiss = faiss
+        faiss.omp_set_num_threads(os.cpu_count() or 1)
+
+        self.name = name
+        self._index_path = os.path.join(str(persist_directory), f"{name}.faiss")
+        self._db_path = os.path.join(str(persist_directory), f"{name}.sqlite3")
+
+        self._db = sqlite3.connect(self._db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            " int_id INTEGER PRIMARY KEY,"
+            " hex_id TEXT UNIQUE,"
+            " document TEXT,"
+            " metadata TEXT,"
+            " embedding BLOB)"
+        )
+        self._db.commit()
+
+        self._index = None
+        if os.path.exists(self._index_path):
+            self._index = faiss.read_index(self._index_path)
+            if hasattr(self._index, "nprobe"):  # flat fallback has none
+                self._index.nprobe = _NPROBE
+
+        # Vectors (and their int ids) held back until the index is trained
+        self._train_vectors = []
+        self._train_ids = []
+        if self._index is None:
+            # Rebuild the pre-training buffer from the vectors persisted in
+            # sqlite, so rows ingested before the index ever trained survive
+            # a restart instead of becoming orphaned metadata
+            buffered = self._db.execute(
+                "SELECT int_id, embedding FROM rows WHERE embedding IS NOT NULL").fetchall()
+            if buffered:
+                self._train_ids = [row[0] for row in buffered]
+                self._train_vectors = [np.vstack(
+                    [np.frombuffer(row[1], dtype=np.float32) for row in buffered])]
+
+        # VectorStore's writer pool can run concurrent upserts against the
+        # same collection; neither faiss index mutation nor the training
+        # buffer's read-modify-write is safe under that, so all access is
+        # serialized per collection
+        self._lock = threading.Lock()
+
+    # Index lifecycle
+
+    def _build_index(self, train_vectors: np.ndarray):
+        """Create and train the index on the buffered sample."""
+        faiss = self._faiss
+        dim = train_vectors.shape[1]
+        if len(train_vectors) < _PQ_TRAIN_MIN:
+            # Too few vectors to train the PQ codebooks (faiss rejects
+            # k-means with fewer points than clusters); an exact flat index
+            # is both correct and cheap at this size
+            logger.debug("%s: %d vectors, using flat index", self.name, len(train_vectors))
+            self._index = faiss.IndexIDMap(faiss.IndexFlatL2(dim))
+            return
+        nlist = min(_NLIST, max(1, len(train_vectors) // _MIN_POINTS_PER_CENTROID))
+        index = faiss.IndexIVFPQ(faiss.IndexFlatL2(dim), dim, nlist, _PQ_M, _PQ_NBITS)
+        index.train(train_vectors)
+        index.nprobe = _NPROBE
+        logger.debug("trained %s: nlist=%d on %d vectors", self.name, nlist, len(train_vectors))
+        self._index = index
+
+    def _flush_training_buffer(self):
+        """Train on the buffer (if needed) and move it into the index."""
+        if not self._train_vectors:
+            return
+        vectors = np.ascontiguousarray(np.vstack(self._train_vectors), dtype=np.float32)
+        ids = np.asarray(self._train_ids, dtype=np.int64)
+        self._train_vectors = []
+        self._train_ids = []
+        if self._index is None:
+            self._build_index(vectors)
+        self._index.add_with_ids(vectors, ids)
+        self._faiss.write_index(self._index, self._index_path)
+        # The persisted index is now the durable copy of these vectors
+        self._db.execute("UPDATE rows SET embedding = NULL")
+        self._db.commit()
+
+    # Chroma-collection-shaped API
+
+    def upsert(self, embeddings, documents, metadatas, ids):
+        """Insert rows, replacing any whose id already exists."""
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        int_ids = np.asarray([_int_id(id_) for id_ in ids], dtype=np.int64)
+
+        with self._lock:
+            # Replace rows already in the trained index
+            if self._index is not None and self._index.ntotal:
+                placeholders = ",".join("?" * len(int_ids))
+                existing = [row[0] for row in self._db.execute(
+                    f"SELECT int_id FROM rows WHERE int_id IN ({placeholders})",
+                    [int(i) for i in int_ids])]
+                if existing:
+                    self._index.remove_ids(
+                        self._faiss.IDSelectorBatch(np.asarray(existing, dtype=np.int64)))
+
+            # While untrained, the vector rides along as a blob so the
+            # training buffer can be rebuilt after a restart; once the
+            # index exists it is the durable copy and the blob stays NULL
+            buffering = self._index is None
+            self._db.executemany(
+                "INSERT OR REPLACE INTO rows (int_id, hex_id, document, metadata, embedding)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [
+                    (int(int_id), hex_id, document, json.dumps(metadata),
+                     embedding.tobytes() if buffering else None)
+                    for int_id, hex_id, document, metadata, embedding
+                    in zip(int_ids, ids, documents, metadatas, embeddings)
+                ]
+            )
+            self._db.commit()
+
+            if self._index is None:
+                # Drop buffered vectors being re-upserted, otherwise training
+                # would add both the stale and the new vector under one id and
+                # searches could hit the stale one
+                incoming = set(int(i) for i in int_ids)
+                if not incoming.isdisjoint(self._train_ids):
+                    kept = [i for i, buffered in enumerate(self._train_ids)
+                            if buffered not in incoming]
+                    buffered_vectors = np.vstack(self._train_vectors)
+                    self._train_vectors = [buffered_vectors[kept]] if kept else []
+                    self._train_ids = [self._train_ids[i] for i in kept]
+                self._train_vectors.append(embeddings)
+                self._train_ids.extend(int(i) for i in int_ids)
+                if sum(len(v) for v in self._train_vectors) >= _TRAIN_MIN:
+                    self._flush_training_buffer()
+            else:
+                self._index.add_with_ids(embeddings, int_ids)
+                self._faiss.write_index(self._index, self._index_path)
+
+    def query(self, query_embeddings, n_results: int = 5):
+        """Search and return a Chroma-shaped dict of lists-of-lists."""
+        query = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+        with self._lock:
+            self._flush_training_buffer()
+            if self._index is None or not self._index.ntotal:
+                return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+            distances, int_ids = self._index.search(query, n_results)
+
+            ids, documents, metadatas, kept_distances = [], [], [], []
+            for distance, int_id in zip(distances[0], int_ids[0]):
+                if int_id < 0:  # faiss pads short result lists with -1
+                    continue
+                row = self._db.execute(
+                    "SELECT hex_id, document, metadata FROM rows WHERE int_id = ?",
+                    (int(int_id),)).fetchone()
+                if row is None:
+                    continue
+                ids.append(row[0])
+                documents.append(row[1])
+                metadatas.append(json.loads(row[2]))
+                kept_distances.append(float(distance))
+
+        return {
+            "ids": [ids],
+            "documents": [documents],
+            "metadatas": [metadatas],
+            "distances": [kept_distances],
+        }
+
+    def delete(self):
+        """Drop the index and metadata store from disk."""
+        self._db.close()
+        for path in (self._index_path, self._db_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._index = None
+        self._train_vectors = []
+        self._train_ids = []
@@ -1,8 +1,51 @@
 # guardrails.py
 
+import logging
 import os
 import re
 
+import numpy as np
+import simsimd
+
+logger = logging.getLogger(__name__)
+
+# Hashed bag-of-words settings for the grounding cosine check
+_BOW_DIM = 4096
+_TOKEN_RE = re.compile(r"\w+")
+
+# Injection patterns sanitized out of user input
+_DANGEROUS_PATTERNS = [
+    r'<script.*?>.*?</script>',  # XSS
+    r'(union|select|drop|delete|insert|update)\s+',  # SQL injection
+    r'(eval|exec|system|shell_exec)\s*\(',  # Code injection
+]
+
+
+def _bow(text: str) -> np.ndarray:
+    """
+    Hash the lowercased tokens of `text` into a fixed-width L2-normalized
+    float32 vector. Two texts sharing vocabulary produce vectors with a high
+    cosine similarity, which approximates the old set-overlap grounding check
+    with a single vectorized dot product instead of Python set operations.
+    """
+    vector = np.zeros(_BOW_DIM, dtype=np.float32)
+    tokens = _TOKEN_RE.findall(text.lower())
+    if tokens:
+        hashes = np.fromiter((hash(t) for t in tokens), dtype=np.int64, count=len(tokens))
+        np.add.at(vector, hashes % _BOW_DIM, 1)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+    return vector
+
+
+def _grounding_score(response: str, sources: list) -> float:
+    """Cosine similarity between the response and the concatenated sources."""
+    if not response or not sources:
+        return 0.0
+    # simsimd.cosine returns a distance; similarity = 1 - distance
+    return 1.0 - float(simsimd.cosine(_bow(response), _bow(" ".join(sources))))
+
 
 class GuardrailsManager:
     def __init__(self):
@@ -18,6 +61,20 @@ class GuardrailsManager:
             self.verify_source_grounding
         ]
 
+        # Precompiled once so the hot paths neither recompile nor rescan:
+        # the unioned injection pattern scans the query in a single pass.
+        self._injection_re = re.compile(
+            "|".join(f"(?:{p})" for p in _DANGEROUS_PATTERNS),
+            re.IGNORECASE | re.DOTALL
+        )
+        self._ref_re = re.compile(r'^[\w\-. ]+$')
+        self._resp_ref_re = re.compile(r'\[Image:\s*([^\]]+)\]|\[Table:\s*([^\]]+)\]')
+
+        # Last (key, vector) pair for the source bag-of-words. Streaming
+        # revalidates the same sources many times per answer; building the
+        # source vector once per source list removes that repeated work.
+        self._src_bow_cache = (None, None)
+
     # Input Validators
 
     def validate_input_length(self, query: str, *args) -> bool:
@@ -28,17 +85,7 @@ class GuardrailsManager:
 
     def check_injection_patterns(self, query: str, *args) -> str:
         """Detect and sanitize potential injection attempts in user input."""
-        dangerous_patterns = [
-            r'<script.*?>.*?</script>',  # XSS
-            r'(union|select|drop|delete|insert|update)\s+',  # SQL injection
-            r'(eval|exec|system|shell_exec)\s*\(',  # Code injection
-        ]
-
-        cleaned_query = query
-        for pattern in dangerous_patterns:
-            cleaned_query = re.sub(pattern, '', cleaned_query, flags=re.IGNORECASE)
-
-        return cleaned_query
+        return self._injection_re.sub('', query)
 
     def validate_content_safety(self, query: str, *args) -> bool:
         """Check for harmful or inappropriate keywords in the input."""
@@ -62,33 +109,46 @@ class GuardrailsManager:
 
     # Output Validators
 
-    def validate_response_accuracy(self, response: str, sources: list) -> bool:
+    def _source_bow(self, sources: list) -> np.ndarray:
+        """Bag-of-words vector for the joined sources, cached per source list."""
+        key = hash(tuple(sources))
+        cached_key, cached_vector = self._src_bow_cache
+        if key != cached_key:
+            cached_vector = _bow(" ".join(sources))
+            self._src_bow_cache = (key, cached_vector)
+        return cached_vector
+
+    def prepare_sources(self, sources: list) -> np.ndarray:
+        """
+        Precompute the source token vector for validate_output. Callers that
+        validate repeatedly against the same sources (e.g. a streaming
+        response) compute this once and pass it via source_vector.
+        """
+        return self._source_bow(sources)
+
+    def validate_response_accuracy(self, response: str, sources: list, score: float = None) -> bool:
         """Verify that the AI response is grounded in source documents."""
-        if not sources:
+        if not response or not sources:
             return False
 
-        source_keywords = set()
-        for source in sources:
-            source_keywords.update(source.split())
+        if score is None:
+            score = _grounding_score(response, sources)
 
-        response_words = set(response.lower().split())
-        overlap = len(source_keywords.intersection(response_words))
+        # Require at least 10% cosine similarity to consider grounded
+        return score >= 0.1
 
-        # Require at least 10% overlap to consider grounded
-        return overlap / len(response_words) >= 0.1 if len(response_words) > 0 else False
-
-    def check_hallucination(self, response: str, sources: list) -> bool:
+    def check_hallucination(self, response: str, sources: list, score: float = None) -> bool:
         """Detect if response contains hallucinated or fabricated content.
 
         Placeholder: Implement more sophisticated hallucination detection if desired.
         """
         # Simple placeholder check - could be improved
-        return self.validate_response_accuracy(response, sources)
+        return self.validate_response_accuracy(response, sources, score)
 
-    def verify_source_grounding(self, response: str, sources: list) -> bool:
+    def verify_source_grounding(self, response: str, sources: list, score: float = None) -> bool:
         """Additional factual consistency or grounding checks if needed."""
         # Placeholder identical to validate_response_accuracy for now
-        return self.validate_response_accuracy(response, sources)
+        return self.validate_response_accuracy(response, sources, score)
 
     # Metadata Reference Validators for Images/Tables
 
@@ -97,7 +157,7 @@ class GuardrailsManager:
         Sanitize metadata references (e.g., image/table file names).
         Prevent path traversal, unusual characters, or malicious payloads.
         """
-        if not re.match(r'^[\w\-. ]+$', ref):
+        if not self._ref_re.match(ref):
             raise ValueError("Invalid reference detected in metadata")
 
         normalized_ref = os.path.normpath(ref)
@@ -124,8 +184,7 @@ class GuardrailsManager:
         Extract image/table references from LLM response text.
         Supports patterns like: [Image: filename.png], [Table: table_1]
         """
-        pattern = r'\[Image:\s*([^\]]+)\]|\[Table:\s*([^\]]+)\]'
-        matches = re.findall(pattern, response)
+        matches = self._resp_ref_re.findall(response)
         refs = []
         for img_ref, table_ref in matches:
             if img_ref:
@@ -148,14 +207,28 @@ class GuardrailsManager:
                 validator(query, context.get('documents', []) if context else [])
         return query
 
-    def validate_output(self, response: str, sources: list, references: list = None) -> bool:
+    def validate_output(self, response: str, sources: list, references: list = None,
+                        source_vector: np.ndarray = None) -> bool:
         """
         Run all output validators sequentially.
         If references to images/tables exist, check their validity.
+        A precomputed source vector (see prepare_sources) may be supplied to
+        skip re-tokenizing the sources.
         """
+        # Nothing can pass validation without both a response and sources;
+        # skip the validator dispatch entirely
+        if not response or not sources:
+            return False
+
+        # Compute the grounding cosine once and share it across validators,
+        # reusing the cached source vector when the sources are unchanged
+        if source_vector is None:
+            source_vector = self._source_bow(sources)
+        score = 1.0 - float(simsimd.cosine(_bow(response), source_vector))
         for validator in self.output_validators:
-            print("vo: =>   ", validator(response, sources))
-            if not validator(response, sources):
+            result = validator(response, sources, score)
+            logger.debug("output validator %s -> %s", validator.__name__, result)
+            if not result:
                 return False
 
         if references:
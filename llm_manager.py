@@ -1,21 +1,54 @@
 # llm_manager.py with Ollama - llama3.1:8b
 
+import json
 import requests
-from typing import Optional
+from requests.adapters import HTTPAdapter
+from typing import Iterator, Optional
 from config import OLLAMA_API_URL, DEFAULT_MODEL_NAME, LLM_PARAMS
 
+# Prompt scaffolding built once at import; per call only context and
+# question are substituted, and the static prefix is eligible for Ollama's
+# prompt cache.
+_PROMPT_TMPL = """
+Context from documents:
+{ctx}
+
+Question: {q}
+
+Instructions:
+- Answer ONLY using the above context.
+- If information is not present, say "I don't have enough information".
+- Be concise and accurate.
+- Cite relevant sections when possible.
+
+Answer:
+"""
+
 
 class LocalLLMManager:
     def __init__(self, model_name: str = DEFAULT_MODEL_NAME, api_url: str = OLLAMA_API_URL):
         self.model_name = model_name
         self.api_url = api_url.rstrip("/")
 
+        # Persistent session so keep-alive amortizes TCP setup across the
+        # tag/pull/generate calls instead of opening a socket per request
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def __del__(self):
+        try:
+            self._session.close()
+        except Exception:
+            pass
+
     def ensure_ollama_running(self) -> bool:
         """
         Check if Ollama local service is running by querying available models/tags.
         """
         try:
-            response = requests.get(f"{self.api_url}/api/tags", timeout=5)
+            response = self._session.get(f"{self.api_url}/api/tags", timeout=1)
             return response.status_code == 200
         except requests.RequestException:
             return False
@@ -26,7 +59,7 @@ class LocalLLMManager:
         """
         model = model_name or self.model_name
         try:
-            response = requests.post(
+            response = self._session.post(
                 f"{self.api_url}/api/pull",
                 json={"name": model},
                 timeout=30
@@ -35,47 +68,74 @@ class LocalLLMManager:
         except requests.RequestException:
             return False
 
-    def generate_response(self, prompt: str, context: str = "") -> str:
+    def warm_up(self) -> None:
         """
-        Send prompt with context to Ollama model and get generated completion.
-        The prompt instructs the model to base answer only on provided context,
-        respond concisely, and indicate lack of info if applicable.
+        Preload the model into memory with a minimal generate call so the
+        first real question skips the model-load delay. keep_alive keeps the
+        weights resident between queries.
         """
-        full_prompt = f"""
-Context from documents:
-{context}
-
-Question: {prompt}
-
-Instructions:
-- Answer ONLY using the above context.
-- If information is not present, say "I don't have enough information".
-- Be concise and accurate.
-- Cite relevant sections when possible.
+        try:
+            self._session.post(
+                f"{self.api_url}/api/generate",
+                json={
+                    "model": self.model_name,
+                    "prompt": " ",
+                    "stream": False,
+                    "keep_alive": "10m"
+                },
+                timeout=120
+            )
+        except requests.RequestException:
+            pass
 
-Answer:
-"""
+    def generate_response_stream(self, prompt: str, context: str = "") -> Iterator[str]:
+        """
+        Stream the generated completion from Ollama, yielding text fragments
+        as they arrive. The prompt instructs the model to base answer only on
+        provided context, respond concisely, and indicate lack of info if
+        applicable. Streaming lets the UI render incrementally and lets
+        guardrails abort a bad generation before it completes.
+        """
+        full_prompt = _PROMPT_TMPL.format(ctx=context, q=prompt)
 
         try:
             payload = {
                 "model": self.model_name,
                 "prompt": full_prompt,
-                "stream": False,
+                "stream": True,
+                "keep_alive": "10m",  # keep model weights loaded between queries
                 "options": {
                     "temperature": LLM_PARAMS.get("temperature", 0.3),
                     "top_p": LLM_PARAMS.get("top_p", 0.9),
-                    "max_tokens": LLM_PARAMS.get("max_tokens", 512)
+                    "max_tokens": LLM_PARAMS.get("max_tokens", 512),
+                    "num_ctx": LLM_PARAMS.get("num_ctx", 4096),
+                    "cache_prompt": True
                 }
             }
-            response = requests.post(
+            response = self._session.post(
                 f"{self.api_url}/api/generate",
                 json=payload,
+                stream=True,
                 timeout=60
             )
-            if response.status_code == 200:
-                json_resp = response.json()
-                return json_resp.get("response", "Error: No response field in API output")
-            else:
-                return f"Error: Ollama returned status {response.status_code}"
+            if response.status_code != 200:
+                yield f"Error: Ollama returned status {response.status_code}"
+                return
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                piece = data.get("response")
+                if piece:
+                    yield piece
+                if data.get("done"):
+                    break
         except requests.RequestException as e:
-            return f"Error: Unable to connect to Ollama server - {str(e)}"
+            yield f"Error: Unable to connect to Ollama server - {str(e)}"
+
+    def generate_response(self, prompt: str, context: str = "") -> str:
+        """
+        Blocking variant of generate_response_stream: collect the full
+        completion and return it as one string.
+        """
+        return "".join(self.generate_response_stream(prompt, context))
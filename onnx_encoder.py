@@ -0,0 +1,86 @@
+# onnx_encoder.py
+
+import os
+
+import numpy as np
+
+from config import EMBEDDING_MODEL_NAME, ONNX_MODEL_DIR
+
+
+class OnnxEncoder:
+    """
+    ONNX Runtime replacement for the PyTorch SentenceTransformer encoder on
+    the CPU serving path.
+
+    On first use the model is exported to ONNX, dynamically quantized to
+    INT8 (AVX-512 VNNI config), and cached under ONNX_MODEL_DIR; later runs
+    load the cached session directly. Tokenization uses the rust-backed fast
+    tokenizer, and mean pooling + L2 normalization run in NumPy, so the
+    PyTorch graph is bypassed entirely.
+
+    Exposes the subset of SentenceTransformer.encode used by VectorStore.
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, export_dir=ONNX_MODEL_DIR):
+        # Heavy optional imports kept local so the default torch backend
+        # does not require optimum/onnxruntime to be installed
+        from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        from transformers import AutoTokenizer
+
+        hub_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+        export_dir = str(export_dir)
+
+        quantized_model = f"{export_dir}/model_quantized.onnx"
+        if not os.path.exists(quantized_model):
+            model = ORTModelForFeatureExtraction.from_pretrained(hub_id, export=True)
+            model.save_pretrained(export_dir)
+            quantizer = ORTQuantizer.from_pretrained(export_dir)
+            quantizer.quantize(
+                save_dir=export_dir,
+                quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False)
+            )
+
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            export_dir, file_name="model_quantized.onnx"
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(hub_id)
+
+    def encode(self, texts, batch_size: int = 128, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, show_progress_bar: bool = False):
+        """
+        Encode a list of texts to a float32 ndarray of sentence embeddings.
+        Matches the SentenceTransformer.encode keywords used by VectorStore;
+        convert_to_numpy/show_progress_bar are accepted for compatibility.
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+
+        # Encode in length order so each batch pads to a similar sequence
+        # length; the result is unshuffled back to the caller's order below
+        order = np.argsort([len(t) for t in texts])
+        texts = [texts[i] for i in order]
+
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                return_tensors="np"
+            )
+            outputs = self.model(**inputs)
+            token_embeddings = np.asarray(outputs.last_hidden_state, dtype=np.float32)
+
+            # Attention-mask-weighted mean pooling fused into one einsum:
+            # the masked sum contracts over the sequence axis without ever
+            # materializing the (batch, seq, dim) masked intermediate
+            mask = np.asarray(inputs["attention_mask"], dtype=np.float32)
+            summed = np.einsum('ij,ijk->ik', mask, token_embeddings)
+            counts = np.clip(mask.sum(axis=1, keepdims=True), 1e-9, None)
+            batches.append(summed / counts)
+
+        embeddings = np.vstack(batches)[np.argsort(order)]
+        if normalize_embeddings:
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings
@@ -0,0 +1,61 @@
+# semantic_cache.py
+
+import numpy as np
+
+from config import SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_SIZE
+
+
+class SemanticCache:
+    """
+    Bounded semantic cache for question answering.
+
+    Stores L2-normalized query embeddings in a float32 matrix alongside the
+    generated (answer, retrieved_chunks) pairs. A lookup is a single matrix
+    product against the cached embeddings; if the best cosine similarity
+    reaches the configured threshold the cached entry is returned and the
+    embedding + LLM pipeline can be skipped entirely.
+
+    Eviction is LRU: hits move an entry to the back, inserts beyond capacity
+    drop the front (least recently used) entry.
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, max_size: int = SEMANTIC_CACHE_SIZE):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.embeddings = None  # float32 matrix, one L2-normalized row per entry
+        self.entries = []       # parallel list of (answer, retrieved_chunks)
+
+    def lookup(self, query_embedding):
+        """
+        Return the cached (answer, retrieved_chunks) for the most similar
+        stored query if its cosine similarity >= threshold, else None.
+        """
+        if self.embeddings is None or not self.entries:
+            return None
+
+        query_embedding = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        sims = self.embeddings @ query_embedding
+        best = int(np.argmax(sims))
+        if sims[best] < self.threshold:
+            return None
+
+        # LRU: move the hit to the back
+        entry = self.entries.pop(best)
+        self.entries.append(entry)
+        row = self.embeddings[best]
+        self.embeddings = np.vstack([np.delete(self.embeddings, best, axis=0), row])
+        return entry
+
+    def add(self, query_embedding, answer, retrieved_chunks):
+        """Insert a new entry, evicting the least recently used if full."""
+        query_embedding = np.asarray(query_embedding, dtype=np.float32).reshape(1, -1)
+
+        if self.embeddings is None:
+            self.embeddings = query_embedding
+        else:
+            if len(self.entries) >= self.max_size:
+                self.entries.pop(0)
+                self.embeddings = self.embeddings[1:]
+            self.embeddings = np.vstack([self.embeddings, query_embedding])
+
+        self.entries.append((answer, retrieved_chunks))
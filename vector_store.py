@@ -3,28 +3,375 @@
 from sentence_transformers import SentenceTransformer
 import chromadb
 from chromadb.config import Settings
-import uuid
-from config import EMBEDDINGS_DIR, VECTOR_STORE_COLLECTION_NAME, EMBEDDING_MODEL_NAME
+import hashlib
+import heapq
+import logging
+import numpy as np
+import os
+import shelve
+import threading
+import torch
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from config import (
+    EMBEDDINGS_DIR,
+    VECTOR_STORE_COLLECTION_NAME,
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_BACKEND,
+    QUANTIZATION,
+    CHROMA_ADD_BATCH_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+# Symmetric scale used for int8 quantization of L2-normalized embeddings
+# (values lie in [-1, 1], so a fixed scale of 127 uses the full int8 range).
+_INT8_SCALE = 127.0
+
+# Minimum batch size before spawning encoder worker processes; below this
+# the pool startup cost outweighs the parallel encode.
+_MULTI_PROCESS_MIN_TEXTS = 1024
+
+# Texts encoded per pipeline segment during ingest; each segment's write
+# overlaps the encode of the next one.
+_PIPELINE_SEGMENT = 5000
+
+# Chroma writes allowed in flight at once while encoding continues
+_MAX_PENDING_WRITES = 2
+
+# Recent query embeddings kept in the per-store LRU cache; repeated
+# queries skip the tokenizer + transformer forward entirely.
+_QUERY_CACHE_SIZE = 1024
+
+
+def _quantize_int8(embeddings: np.ndarray) -> np.ndarray:
+    """
+    Scalar-quantize normalized float32 embeddings to int8 with a fixed
+    uniform scale and zero-point 0. A uniform scale multiplies every inner
+    product by the same constant, so ranking on unit vectors is preserved
+    up to rounding; a per-dimension scale was tried and reverted — it
+    reweights dimensions by 1/scale^2 inside the searched inner product
+    and distorts ranking.
+    """
+    return np.clip(np.round(embeddings * _INT8_SCALE), -127, 127).astype(np.int8)
+
+
+def _content_key(text: str) -> str:
+    """Content hash used as embedding-cache key (blake2b: fast, non-crypto use)."""
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+# Value types ChromaDB can store as-is; built once instead of per call
+_ALLOWED_METADATA_TYPES = (str, int, float, bool, type(None))
+
+
+def _sanitize_metadata(md):
+    """Cast metadata values ChromaDB cannot store (lists/dicts/...) to strings."""
+    # One comprehension builds the final dict directly — no copy-then-mutate
+    return {k: (v if isinstance(v, _ALLOWED_METADATA_TYPES) else str(v)) for k, v in md.items()}
+
+
+def _caption_text(chunk_type, content, metadata):
+    """Embedding text for image/table chunks: their caption."""
+    return f"[{chunk_type.upper()}] {metadata.get('caption', 'No caption')}"
+
+
+def _content_text(chunk_type, content, metadata):
+    """Embedding text for text (and unknown) chunks: the content itself."""
+    return content if isinstance(content, str) else str(content)
+
+
+# Dispatch table for text_for_embedding, keyed by chunk type
+_EMBED_TEXT = {
+    "text": _content_text,
+    "image": _caption_text,
+    "table": _caption_text,
+}
+
+
+def _table_to_md(content):
+    """Flatten a list-of-lists table into a pipe-separated string."""
+    # One implementation for every table size: a csv.writer fast path was
+    # tried but its quoting and line terminators made large tables store
+    # differently from small ones. Generators (no materialized inner lists)
+    # keep peak memory at one row.
+    return "\n".join(" | ".join("" if cell is None else cell for cell in row) for row in content)
+
+
+def _merge_query_results(partials: list, n_results: int) -> dict:
+    """Merge per-shard query results into one global top-K result dict."""
+    merged = []
+    for result in partials:
+        distances = (result.get("distances") or [[]])[0]
+        ids = (result.get("ids") or [[]])[0]
+        documents = (result.get("documents") or [[]])[0]
+        metadatas = (result.get("metadatas") or [[]])[0]
+        merged.extend(zip(distances, ids, documents, metadatas))
+
+    top = heapq.nsmallest(n_results, merged, key=lambda row: row[0])
+    return {
+        "ids": [[row[1] for row in top]],
+        "documents": [[row[2] for row in top]],
+        "metadatas": [[row[3] for row in top]],
+        "distances": [[row[0] for row in top]],
+    }
+
+
+def _doc_text(chunk_type, content):
+    """
+    Document string stored in ChromaDB: tables flatten to a markdown-like
+    pipe-separated string, everything else is stored as-is (stringified).
+    """
+    if chunk_type == "table" and isinstance(content, list) and all(isinstance(row, list) for row in content):
+        return _table_to_md(content)
+    return content if isinstance(content, str) else str(content)
 
 
 class VectorStore:
-    def __init__(self, persist_directory: str = EMBEDDINGS_DIR):
-        self.embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME, device='cpu')
+    # One loaded encoder per (backend, model name), shared by every store in
+    # the process: model load takes tens of seconds and duplicating it wastes
+    # RAM/VRAM. Populated lazily on first encode, not at construction.
+    _MODEL_CACHE = {}
+    _MODEL_LOCK = threading.Lock()
+
+    @classmethod
+    def _load_model(cls):
+        """Build the (model, device) pair for the configured backend."""
+        if EMBEDDING_BACKEND == "onnx":
+            # INT8 ONNX Runtime session; skips the PyTorch graph on CPU
+            from onnx_encoder import OnnxEncoder
+            return OnnxEncoder(EMBEDDING_MODEL_NAME), 'cpu'
+
+        # Embed on GPU in fp16 when available; embedding inference dominates
+        # ingest time and MiniLM loses no meaningful recall at half precision
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        model = SentenceTransformer(EMBEDDING_MODEL_NAME, device=device)
+        if device == 'cuda':
+            model = model.half()
+        else:
+            # Let PyTorch intra-op parallelism use every core for the
+            # CPU encode path
+            torch.set_num_threads(os.cpu_count() or 1)
+        return model, device
+
+    @classmethod
+    def _get_model(cls):
+        key = (EMBEDDING_BACKEND, EMBEDDING_MODEL_NAME)
+        entry = cls._MODEL_CACHE.get(key)
+        if entry is None:
+            with cls._MODEL_LOCK:
+                entry = cls._MODEL_CACHE.get(key)
+                if entry is None:
+                    entry = cls._load_model()
+                    cls._MODEL_CACHE[key] = entry
+        return entry
+
+    @property
+    def embedding_model(self):
+        return self._get_model()[0]
+
+    @property
+    def device(self):
+        return self._get_model()[1]
+
+    def __init__(self, persist_directory: str = EMBEDDINGS_DIR, reduce_dim: Optional[int] = None,
+                 hnsw_m: int = 24, hnsw_construction_ef: int = 128, hnsw_search_ef: int = 100,
+                 num_shards: int = 1, backend: str = "chroma"):
+        # Index backend: "chroma" (default, HNSW) or "faiss_ivfpq", which
+        # trades a little recall for a ~24x smaller index — the right call
+        # past ~1M chunks where HNSW memory becomes prohibitive. The faiss
+        # path needs faiss-cpu installed; see faiss_store.py.
+        self.backend = backend
+        self._persist_directory = str(persist_directory)
+
+        # HNSW tuning: Chroma's defaults (M=16, construction_ef=100,
+        # search_ef=10) under-configure the index for this query workload;
+        # exposed as constructor args so callers can tune per collection.
+        self.hnsw_m = hnsw_m
+        self.hnsw_construction_ef = hnsw_construction_ef
+        self.hnsw_search_ef = hnsw_search_ef
+
         self.chroma_client = chromadb.PersistentClient(
             path=str(persist_directory),
             settings=Settings(anonymized_telemetry=False)
         )
-        self.collection = None
+        # Optional sharding: very large collections in a single Chroma index
+        # degrade retrieval latency for everything in the same database, so
+        # rows can be spread over num_shards collections (route by id hash)
+        # and queries fanned out + merged. num_shards=1 keeps the original
+        # single collection and its name.
+        self.num_shards = max(1, num_shards)
+        self.collections = []
+        self._pool = None  # lazily created multi-process encode pool
 
-    def create_collection(self, collection_name: str = VECTOR_STORE_COLLECTION_NAME):
-        """Create or get collection for storing embeddings."""
+        # LRU of recent query embeddings keyed by the raw query string;
+        # search endpoints see the same queries repeatedly and a hit skips
+        # the whole encode
+        self._query_cache = OrderedDict()
+
+        # On-disk embedding cache keyed by content hash: reruns and partial
+        # re-indexes of unchanged chunks skip the encoder entirely. The
+        # backend and model name are part of the path so switching encoders
+        # never serves vectors produced by the previous model.
+        self._emb_cache = None
+        self._emb_cache_path = os.path.join(
+            str(persist_directory),
+            f"emb_cache_{EMBEDDING_BACKEND}_{EMBEDDING_MODEL_NAME.replace('/', '_')}")
+
+        # Optional PCA projection: halving/quartering dims cuts the bytes
+        # the ANN scan moves per distance evaluation proportionally. Fitted
+        # on the first ingest batch and persisted beside the Chroma data.
+        # Leave reduce_dim=None when recall matters more than latency.
+        self.reduce_dim = reduce_dim
+        self._pca = None  # (mean, components) once loaded/fitted
+        self._pca_mean_path = os.path.join(str(persist_directory), "pca_mean.npy")
+        self._pca_components_path = os.path.join(str(persist_directory), "pca_components.npy")
+
+    def _apply_pca(self, embeddings: np.ndarray, fit: bool = False) -> np.ndarray:
+        """
+        Project embeddings down to reduce_dim via the persisted PCA, fitting
+        it on this batch first when requested and no projection exists yet.
+        Projected vectors are re-normalized so downstream quantization and
+        cosine/L2 ranking keep working on unit vectors.
+        """
+        if self.reduce_dim is None:
+            return embeddings
+
+        if self._pca is None:
+            if os.path.exists(self._pca_components_path):
+                self._pca = (np.load(self._pca_mean_path), np.load(self._pca_components_path))
+            elif fit and len(embeddings):
+                # Always fit on the first batch, capping n_components at the
+                # sample size: skipping the fit for a small batch would write
+                # full-dimension rows that later projected batches (and
+                # queries after a restart) could never match
+                from sklearn.decomposition import PCA
+                pca = PCA(n_components=min(self.reduce_dim, len(embeddings), embeddings.shape[1]))
+                pca.fit(embeddings)
+                np.save(self._pca_mean_path, pca.mean_.astype(np.float32))
+                np.save(self._pca_components_path, pca.components_.astype(np.float32))
+                self._pca = (pca.mean_.astype(np.float32), pca.components_.astype(np.float32))
+
+        if self._pca is None:
+            return embeddings
+
+        mean, components = self._pca
+        projected = (embeddings - mean) @ components.T
+        norms = np.linalg.norm(projected, axis=1, keepdims=True)
+        return projected / np.maximum(norms, 1e-12)
+
+    def _get_encode_pool(self):
+        """Lazily spawn worker processes that shard encode batches across cores."""
+        if self._pool is None:
+            workers = max(1, (os.cpu_count() or 2) - 1)
+            self._pool = self.embedding_model.start_multi_process_pool(['cpu'] * workers)
+        return self._pool
+
+    def close_pool(self):
+        """Stop the multi-process encode pool if it was started."""
+        if self._pool is not None:
+            self.embedding_model.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+    def _get_emb_cache(self):
+        """Lazily open the on-disk embedding cache."""
+        if self._emb_cache is None:
+            self._emb_cache = shelve.open(self._emb_cache_path)
+        return self._emb_cache
+
+    def __del__(self):
         try:
-            self.collection = self.chroma_client.get_collection(collection_name)
+            self.close_pool()
+            if self._emb_cache is not None:
+                self._emb_cache.close()
         except Exception:
-            self.collection = self.chroma_client.create_collection(
-                name=collection_name,
-                metadata={"description": "Runbook document embeddings"}
+            pass
+
+    def _encode_texts(self, texts: list) -> np.ndarray:
+        """
+        Encode texts to L2-normalized float32 embeddings. Large CPU batches
+        shard across worker processes; otherwise encode in-process.
+        """
+        if (self.device == 'cpu' and len(texts) >= _MULTI_PROCESS_MIN_TEXTS
+                and hasattr(self.embedding_model, 'encode_multi_process')):
+            # Sort by length so each worker chunk pads to similar sequence
+            # lengths (workers batch in the order they receive texts), then
+            # restore the original order. The in-process encode path skips
+            # this: SentenceTransformer.encode sorts internally.
+            order = np.argsort([len(t) for t in texts])
+            embeddings = self.embedding_model.encode_multi_process(
+                [texts[i] for i in order],
+                self._get_encode_pool(),
+                batch_size=128,
+                chunk_size=5000
+            )
+            embeddings = np.asarray(embeddings, dtype=np.float32)[np.argsort(order)]
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        else:
+            embeddings = self.embedding_model.encode(
+                texts,
+                batch_size=128,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
             )
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def _encode_cached(self, texts: list) -> np.ndarray:
+        """
+        Encode texts, reusing cached embeddings for content seen before.
+        Only cache misses hit the encoder; results are stitched back into
+        the original order.
+        """
+        cache = self._get_emb_cache()
+        keys = [_content_key(text) for text in texts]
+        miss_indices = [i for i, key in enumerate(keys) if key not in cache]
+
+        if miss_indices:
+            miss_embeddings = self._encode_texts([texts[i] for i in miss_indices])
+            for i, embedding in zip(miss_indices, miss_embeddings):
+                cache[keys[i]] = embedding
+            cache.sync()
+
+        return np.stack([cache[key] for key in keys])
+
+    def create_collection(self, collection_name: str = VECTOR_STORE_COLLECTION_NAME):
+        """Create or get the shard collections for storing embeddings."""
+        shard_names = (
+            [collection_name] if self.num_shards == 1
+            else [f"{collection_name}_s{i}" for i in range(self.num_shards)]
+        )
+        self.collections = []
+        if self.backend == "faiss_ivfpq":
+            from faiss_store import FaissIVFPQCollection
+            self.collections = [
+                FaissIVFPQCollection(name, self._persist_directory) for name in shard_names
+            ]
+            return
+        for name in shard_names:
+            try:
+                self.collections.append(self.chroma_client.get_collection(name))
+            except Exception:
+                self.collections.append(self.chroma_client.create_collection(
+                    name=name,
+                    metadata={
+                        "description": "Runbook document embeddings",
+                        # Embeddings are L2-normalized once at encode time, so
+                        # inner product ranks identically to cosine here and
+                        # skips the per-distance norm Chroma's cosine kernel
+                        # would otherwise recompute
+                        "hnsw:space": "ip",
+                        "hnsw:M": self.hnsw_m,
+                        "hnsw:construction_ef": self.hnsw_construction_ef,
+                        "hnsw:search_ef": self.hnsw_search_ef,
+                        "hnsw:num_threads": os.cpu_count() or 1
+                    }
+                ))
+
+    def _shard_index(self, id_: str) -> int:
+        """Index of the shard a row with this (hex) id lives in."""
+        return int(id_, 16) % self.num_shards
 
     def add_documents(self, chunks_with_meta: list):
         """
@@ -40,67 +387,113 @@ class VectorStore:
 
         Tables are converted to markdown-like string for storage required by ChromaDB.
         """
-        if not self.collection:
+        if not self.collections:
             self.create_collection()
 
-        texts_to_embed = []
-        metadatas = []
-        ids = []
-        chroma_docs = []  # documents as strings for ChromaDB
-
-        for idx, chunk in enumerate(chunks_with_meta):
-            chunk_type = chunk.get("type", "text")
-            metadata = chunk.get("metadata", {})
-            content = chunk.get("content", "")
-
-            # Prepare embedding text: content for text, captions for images/tables
-            if chunk_type == "text":
-                text_for_embedding = content
-            elif chunk_type in ["image", "table"]:
-                caption = metadata.get("caption", "No caption")
-                text_for_embedding = f"[{chunk_type.upper()}] {caption}"
-            else:
-                text_for_embedding = content if isinstance(content, str) else str(content)
-
-            texts_to_embed.append(text_for_embedding)
-
-            # Enhance metadata with chunk info
-            metadata_enhanced = metadata.copy()
-            metadata_enhanced["chunk_type"] = chunk_type
-            metadata_enhanced["chunk_index"] = idx
-            
-            def sanitize_metadata(md):
-                md = dict(md)
-                for k, v in md.items():
-                    if not isinstance(v, (str, int, float, bool, type(None))):
-                        md[k] = str(v)
-                return md
-            
-            metadatas.append(sanitize_metadata(metadata_enhanced))
-
-            ids.append(str(uuid.uuid4()))
-
-            # Prepare document string for ChromaDB:
-            # For tables, convert list-of-lists to markdown-like string
-            if chunk_type == "table" and isinstance(content, list) and all(isinstance(row, list) for row in content):
-                # Convert each row to pipe-separated line
-                content_str = "\n".join([" | ".join(cell if cell is not None else "" for cell in row) for row in content])
-                chroma_docs.append(content_str)
-            else:
-                # For images content may be empty string, for text ensure string
-                chroma_docs.append(content if isinstance(content, str) else str(content))
-
-        # Generate embeddings for all chunks
-        embeddings = self.embedding_model.encode(texts_to_embed).tolist()
-
-        # Add all data to vector store collection
-        self.collection.add(
-            embeddings=embeddings,
-            documents=chroma_docs,      # all strings as required by ChromaDB
-            metadatas=metadatas,
-            ids=ids
-        )
-        print(self.collection)
+        # Tight comprehensions instead of one interpreted per-chunk loop:
+        # embedding text dispatches on chunk type via the lookup table,
+        # metadata is enhanced + sanitized in one construction, and ids use
+        # uuid4().hex (faster, and 32 chars instead of 36).
+        chunk_types = [chunk.get("type", "text") for chunk in chunks_with_meta]
+
+        texts_to_embed = [
+            _EMBED_TEXT.get(chunk_type, _content_text)(
+                chunk_type, chunk.get("content", ""), chunk.get("metadata", {}))
+            for chunk, chunk_type in zip(chunks_with_meta, chunk_types)
+        ]
+
+        metadatas = [
+            _sanitize_metadata({
+                **chunk.get("metadata", {}),
+                "chunk_type": chunk_type,
+                "chunk_index": idx
+            })
+            for idx, (chunk, chunk_type) in enumerate(zip(chunks_with_meta, chunk_types))
+        ]
+
+        # Content-addressable ids (blake2b of source + file ref + embedding
+        # text): the same chunk re-ingested maps to the same id, so reruns
+        # become idempotent upserts instead of piling up duplicates. The
+        # file ref — set for image chunks, deterministic per document —
+        # keeps distinct images apart even when their captions (their
+        # embedding text) match, e.g. two images on the same page.
+        ids = [
+            hashlib.blake2b(
+                f"{metadata.get('source', '')}\0{metadata.get('file', '')}\0{text}".encode(),
+                digest_size=16).hexdigest()
+            for metadata, text in zip(metadatas, texts_to_embed)
+        ]
+
+        # Documents as strings for ChromaDB
+        chroma_docs = [
+            _doc_text(chunk_type, chunk.get("content", ""))
+            for chunk, chunk_type in zip(chunks_with_meta, chunk_types)
+        ]
+
+        # Drop exact duplicates within this batch (upsert rejects repeated
+        # ids in one call); the first occurrence wins
+        if len(set(ids)) != len(ids):
+            seen = set()
+            keep = [i for i, id_ in enumerate(ids) if not (id_ in seen or seen.add(id_))]
+            ids = [ids[i] for i in keep]
+            texts_to_embed = [texts_to_embed[i] for i in keep]
+            metadatas = [metadatas[i] for i in keep]
+            chroma_docs = [chroma_docs[i] for i in keep]
+
+        # Producer-consumer pipeline: encode one segment (normalized so int8
+        # quantization can use a fixed scale, reusing cached embeddings for
+        # previously seen content) while a writer thread drains earlier
+        # segments into Chroma in fixed-size batches. The embedded
+        # PersistentClient has no async API, so a thread provides the
+        # encode/write overlap instead. Embeddings stay ndarrays end to end.
+        with ThreadPoolExecutor(max_workers=_MAX_PENDING_WRITES) as writer:
+            pending = deque()
+            for seg_start in range(0, len(ids), _PIPELINE_SEGMENT):
+                seg_stop = seg_start + _PIPELINE_SEGMENT
+                embeddings = self._apply_pca(
+                    self._encode_cached(texts_to_embed[seg_start:seg_stop]), fit=True)
+                if QUANTIZATION == "int8":
+                    embeddings = _quantize_int8(embeddings)
+
+                # Route each row of this segment to its shard, then upsert
+                # per shard in fixed-size batches
+                shard_rows = {}
+                for local, id_ in enumerate(ids[seg_start:seg_start + len(embeddings)]):
+                    shard_rows.setdefault(self._shard_index(id_), []).append(local)
+
+                for shard, rows in shard_rows.items():
+                    collection = self.collections[shard]
+                    for start in range(0, len(rows), CHROMA_ADD_BATCH_SIZE):
+                        selected = rows[start:start + CHROMA_ADD_BATCH_SIZE]
+                        while len(pending) >= _MAX_PENDING_WRITES:
+                            pending.popleft().result()
+                        pending.append(writer.submit(
+                            collection.upsert,
+                            embeddings=embeddings[selected],
+                            documents=[chroma_docs[seg_start + j] for j in selected],  # all strings as required by ChromaDB
+                            metadatas=[metadatas[seg_start + j] for j in selected],
+                            ids=[ids[seg_start + j] for j in selected]
+                        ))
+            while pending:
+                pending.popleft().result()
+
+    def embed_query(self, query: str):
+        """
+        Embed a single query and return an L2-normalized float32 vector,
+        memoized in a small LRU keyed by the query string. Used by both
+        search_similar and the semantic query cache.
+        """
+        embedding = self._query_cache.get(query)
+        if embedding is not None:
+            self._query_cache.move_to_end(query)
+            return embedding
+
+        embedding = self.embedding_model.encode([query], normalize_embeddings=True)
+        embedding = np.asarray(embedding, dtype=np.float32)[0]
+        self._query_cache[query] = embedding
+        if len(self._query_cache) > _QUERY_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
+        return embedding
 
     def search_similar(self, query: str, n_results: int = 5):
         """
@@ -108,22 +501,40 @@ class VectorStore:
 
         Returns dict with keys like "documents" and "metadatas", each a list of lists (for queries).
         """
-        print(self.collection,"<<")
-        if not self.collection:
-            print("Hi")
+        if not self.collections:
             self.create_collection()
+        # .name is a cheap string access; never repr the collection here,
+        # which can trigger metadata fetches on newer Chroma versions
+        logger.debug("querying %d shard(s) of %s", len(self.collections), self.collections[0].name)
 
-        query_embedding = self.embedding_model.encode([query]).tolist()
+        query_embedding = self._apply_pca(self.embed_query(query)[None, :])
+        if QUANTIZATION == "int8":
+            query_embedding = _quantize_int8(query_embedding)
 
-        results = self.collection.query(
-            query_embeddings=query_embedding,
-            n_results=n_results
-        )
+        if self.num_shards == 1:
+            return self.collections[0].query(
+                query_embeddings=query_embedding,
+                n_results=n_results
+            )
 
-        return results
+        # Fan the query out to every shard concurrently and merge the
+        # per-shard top-K into a global top-K by distance. Chroma releases
+        # the GIL inside the HNSW search, so the threads genuinely scan
+        # shards on separate cores.
+        with ThreadPoolExecutor(max_workers=len(self.collections)) as executor:
+            partials = list(executor.map(
+                lambda collection: collection.query(
+                    query_embeddings=query_embedding, n_results=n_results),
+                self.collections
+            ))
+        return _merge_query_results(partials, n_results)
 
     def clear_collection(self):
-        """Delete the current collection and reset."""
-        if self.collection:
-            self.chroma_client.delete_collection(self.collection.name)
-            self.collection = None
+        """Delete the current collections (all shards) and reset."""
+        for collection in self.collections:
+            if self.backend == "faiss_ivfpq":
+                collection.delete()
+            else:
+                self.chroma_client.delete_collection(collection.name)
+        self.collections = []
+        self.close_pool()